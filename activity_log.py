@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from bson import Binary, json_util
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELDS = ('original', 'corrected')
+DUPLICATE_KEY = 11000
+
+_STOP = object()
+
+
+# Buffers activity log records in memory and writes them to Mongo from a
+# background thread with unordered insert_many, so requests never wait on Mongo.
+# Batches that still fail after retrying are appended to a JSON-lines spill file
+# and replayed after the next successful write.
+class ActivityLogWriter:
+    def __init__(self, collection, max_queue=10000, batch_size=200, flush_interval=1.0,
+                 retries=3, spill_path=None, max_text_chars=10000, text_mode='truncate'):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.spill_path = spill_path
+        self.max_text_chars = max_text_chars
+        self.text_mode = text_mode
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.spilled = 0
+
+    def _ensure_started(self):
+        # The thread is started lazily so that each forked worker gets its own.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._thread = threading.Thread(target=self._run, name='activity-log', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def _compact(self, record):
+        for field in TEXT_FIELDS:
+            text = record.get(field)
+            if not isinstance(text, str) or len(text) <= self.max_text_chars:
+                continue
+            record[f'{field}_sha256'] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            record[f'{field}_length'] = len(text)
+            if self.text_mode == 'compress':
+                record[f'{field}_zlib'] = Binary(zlib.compress(text.encode('utf-8')))
+                del record[field]
+            else:
+                record[field] = text[:self.max_text_chars]
+        return record
+
+    def write(self, record):
+        record = self._compact(dict(record, logged_at=datetime.now(timezone.utc)))
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._spill([record])
+
+    # ---------- writer thread ----------
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._flush(batch)
+                batch = []
+                item.set()
+                continue
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _insert(self, records):
+        try:
+            self.collection.insert_many(records, ordered=False)
+        except BulkWriteError as e:
+            # Records from an earlier, partly applied attempt already have their _id.
+            if any(err.get('code') != DUPLICATE_KEY for err in e.details.get('writeErrors', [])):
+                raise
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        for attempt in range(self.retries):
+            try:
+                self._insert(batch)
+                self.written += len(batch)
+                self._replay_spill()
+                return
+            except Exception as e:
+                logger.warning(f"Activity log write failed (attempt {attempt + 1}): {e}")
+                time.sleep(min(0.5 * 2 ** attempt, 5))
+        self._spill(batch)
+
+    def _spill(self, records):
+        if not self.spill_path:
+            logger.error(f"Dropping {len(records)} activity log records")
+            return
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write("".join(json_util.dumps(r) + "\n" for r in records))
+            self.spilled += len(records)
+        except OSError as e:
+            logger.error(f"Could not spill {len(records)} activity log records: {e}")
+
+    def _replay_spill(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        replay_path = f"{self.spill_path}.{os.getpid()}"
+        try:
+            # Renaming claims the file, so only one worker replays it.
+            os.replace(self.spill_path, replay_path)
+        except OSError:
+            return
+        with open(replay_path, encoding='utf-8') as f:
+            records = [json_util.loads(line) for line in f if line.strip()]
+        try:
+            for i in range(0, len(records), self.batch_size):
+                self._insert(records[i:i + self.batch_size])
+            self.written += len(records)
+            logger.info(f"Replayed {len(records)} spilled activity log records")
+        except Exception as e:
+            logger.warning(f"Activity log replay failed: {e}")
+            self._spill(records)
+        os.remove(replay_path)
+
+    # ---------- control ----------
+
+    def flush(self, timeout=10):
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'spilled': self.spilled,
+        }
@@ -1,15 +1,30 @@
 import os
 import secrets
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g, has_request_context, Response
+from flask.sessions import SecureCookieSessionInterface
 from werkzeug.security import generate_password_hash, check_password_hash
 import language_tool_python
 from pymongo import MongoClient
 from dotenv import load_dotenv
 from textblob import TextBlob
-from deep_translator import GoogleTranslator
-import PyPDF2
+import codecs
+import gc
 import logging
+import multiprocessing.util
 import re
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import atexit
+import json
+import time
+import jobs
+import metrics
+from activity_log import ActivityLogWriter
+from cache import ResultCache, file_digest, make_key
+from result_store import ResultStore
+from grammar_pool import LanguageToolPool
+from spelling import SpellingEngine, default_dictionary_path
 
 # Load environment variables
 load_dotenv()
@@ -17,15 +32,127 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", secrets.token_hex(16))
 
+# Session cookie (de)serialization is timed as its own stage
+class TimedSessionInterface(SecureCookieSessionInterface):
+    def open_session(self, app, request):
+        with metrics.timer('session_open'):
+            return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        with metrics.timer('session_save'):
+            return super().save_session(app, session, response)
+
+app.session_interface = TimedSessionInterface()
+
 # MongoDB setup
-client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
-db = client['spellingApp']
-users_collection = db['users']
-logs_collection = db['logs']
+# The client is created on first use in each process: under `gunicorn --preload`
+# this module is imported in the master, and a MongoClient must not cross fork().
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+mongo_client = None
+mongo_client_pid = None
+mongo_client_lock = threading.Lock()
+
+def get_db():
+    global mongo_client, mongo_client_pid
+    with mongo_client_lock:
+        if mongo_client is None or mongo_client_pid != os.getpid():
+            mongo_client = MongoClient(MONGO_URI, event_listeners=[metrics.MongoCommandTimer()])
+            mongo_client_pid = os.getpid()
+        return mongo_client['spellingApp']
+
+class LazyCollection:
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
+users_collection = LazyCollection('users')
+logs_collection = LazyCollection('logs')
+jobs_collection = LazyCollection('jobs')
+results_collection = LazyCollection('results')
 
 # Logging setup
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
+# Full request/result texts are only logged when explicitly asked for.
+LOG_TEXT_DUMPS = os.getenv("LOG_TEXT_DUMPS", "false").lower() in ("1", "true", "yes")
+
+# Activity logs are buffered and written to logs_collection in batches
+activity_log = ActivityLogWriter(
+    logs_collection,
+    max_queue=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("LOG_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")),
+    spill_path=os.getenv("LOG_SPILL_PATH", os.path.join(tempfile.gettempdir(), "spellingapp-log-spill.jsonl")),
+    max_text_chars=int(os.getenv("LOG_MAX_TEXT_CHARS", "10000")),
+    text_mode=os.getenv("LOG_TEXT_MODE", "truncate"),
+)
+atexit.register(activity_log.close)
+
+# Result cache shared by the processing helpers, keyed by (operation, language, text)
+result_cache = ResultCache(
+    max_bytes=int(os.getenv("RESULT_CACHE_BYTES", str(64 * 1024 * 1024))),
+    ttls={
+        'spell': int(os.getenv("CACHE_TTL_SPELL", "86400")),
+        'grammar': int(os.getenv("CACHE_TTL_GRAMMAR", "86400")),
+        'translate': int(os.getenv("CACHE_TTL_TRANSLATE", "3600")),
+        'tone': int(os.getenv("CACHE_TTL_TONE", "86400")),
+        'file': int(os.getenv("CACHE_TTL_FILE", "3600")),
+    },
+    disk_path=os.getenv("RESULT_CACHE_PATH") or None,
+)
+
+# Processed texts are kept server-side; the session only holds their ids.
+# RESULT_STORE_BACKEND: 'sqlite' (default; RESULT_STORE_PATH, shared by the workers
+# on this host), 'memory' (this worker only) or 'mongo' (SQLite/memory as above,
+# plus a background copy of results up to RESULT_STORE_MONGO_MAX_BYTES in Mongo).
+RESULT_STORE_BACKEND = os.getenv("RESULT_STORE_BACKEND", "sqlite")
+RESULT_STORE_TTL = int(os.getenv("RESULT_STORE_TTL", "86400"))
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH") or (
+    os.path.join(tempfile.gettempdir(), "spellingapp-results.sqlite3") if RESULT_STORE_BACKEND == 'sqlite' else None)
+result_writer = None
+if RESULT_STORE_BACKEND == 'mongo':
+    result_writer = ActivityLogWriter(
+        results_collection,
+        batch_size=int(os.getenv("LOG_BATCH_SIZE", "200")),
+        flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")),
+    )
+    atexit.register(result_writer.close)
+result_store = ResultStore(
+    ResultCache(
+        max_bytes=int(os.getenv("RESULT_STORE_BYTES", str(32 * 1024 * 1024))),
+        ttls={'result': RESULT_STORE_TTL},
+        disk_path=RESULT_STORE_PATH,
+    ),
+    writer=result_writer,
+    ttl=RESULT_STORE_TTL,
+    max_shared_bytes=int(os.getenv("RESULT_STORE_MONGO_MAX_BYTES", str(1024 * 1024))),
+)
+
+# Helper: Return the cached result for op/lang/text, or compute and cache it.
+# compute() should raise on failure so that fallbacks are never cached.
+# on_store(key, value) is called when a new value is cached.
+def cached_result(op, lang, text, compute, on_store=None):
+    key = make_key(op, lang, text)
+    value = result_cache.get(key)
+    hit = value is not None
+    if not hit:
+        value = compute()
+        result_cache.set(key, value)
+        if on_store is not None:
+            on_store(key, value)
+    if has_request_context():
+        g.setdefault('cache_lookups', {})[op] = (key, hit)
+    return value
+
+# Helper: Text fields for a log entry. A cache hit was already logged in full
+# under the same cache_key, so only the key is stored again.
+def log_texts(op, original, corrected):
+    key, hit = g.get('cache_lookups', {}).get(op, (None, False))
+    if hit:
+        return {'cache_key': key}
+    return {'original': original, 'corrected': corrected, 'cache_key': key}
 
 # LanguageTool setup
 def get_language_tool(lang):
@@ -35,68 +162,463 @@ def get_language_tool(lang):
         logger.error(f"Failed to initialize LanguageTool for {lang}: {e}")
         return language_tool_python.LanguageTool('en-US')
 
+# Engines are shared between requests; each one keeps a Java server running.
+language_tools = LanguageToolPool(
+    get_language_tool,
+    max_per_language=int(os.getenv("LANGUAGETOOL_POOL_PER_LANGUAGE", "2")),
+    max_total=int(os.getenv("LANGUAGETOOL_POOL_MAX", "4")),
+    idle_timeout=int(os.getenv("LANGUAGETOOL_IDLE_TIMEOUT", "600")),
+    checkout_timeout=int(os.getenv("LANGUAGETOOL_CHECKOUT_TIMEOUT", "30")),
+)
+LANGUAGETOOL_WARM_LANGUAGES = [l.strip() for l in os.getenv("LANGUAGETOOL_WARM_LANGUAGES", "en").split(",") if l.strip()]
+
+def warm_up_language_tools():
+    language_tools.warm_up(LANGUAGETOOL_WARM_LANGUAGES)
+
+# Languages accepted for grammar checks. Each one may start a LanguageTool
+# server, so requests cannot pick arbitrary codes. LanguageTool has no Hindi
+# model; 'hi' is served by the en-US engine, as it always was.
+GRAMMAR_LANGUAGES = [l.strip() for l in os.getenv("GRAMMAR_LANGUAGES", "en,hi").split(",") if l.strip()]
+
+# Large texts are checked in paragraph/sentence aligned chunks, in parallel.
+GRAMMAR_CHUNK_CHARS = int(os.getenv("GRAMMAR_CHUNK_CHARS", "5000"))
+GRAMMAR_PARALLELISM = int(os.getenv("GRAMMAR_PARALLELISM", str(language_tools.max_per_language)))
+PARAGRAPH_END_RE = re.compile(r'\n[ \t]*\n\s*')
+grammar_executor = None
+sentence_tokenizer = None
+
+def get_sentence_tokenizer():
+    # NLTK's punkt model knows abbreviations such as "Dr." and "p.m.", which a
+    # punctuation regex splits on. Install it with `python -m nltk.downloader punkt_tab`;
+    # without it, long paragraphs fall back to _fallback_spans.
+    global sentence_tokenizer
+    if sentence_tokenizer is None:
+        try:
+            from nltk.tokenize import PunktTokenizer
+            sentence_tokenizer = PunktTokenizer('english')
+        except (ImportError, LookupError):
+            logger.warning("NLTK punkt_tab is not installed; long paragraphs are split at line and sentence ends")
+            sentence_tokenizer = False
+    return sentence_tokenizer or None
+
+def _sentence_spans(text, start, end):
+    # (start, end) pieces of text[start:end], each ending where the next sentence starts.
+    tokenizer = get_sentence_tokenizer()
+    if tokenizer is None:
+        yield start, end
+        return
+    starts = [start + s for s, _ in tokenizer.span_tokenize(text[start:end])][1:]
+    for piece_end in starts:
+        yield start, piece_end
+        start = piece_end
+    yield start, end
+
+# Break points for text that is still too long, best first. PDF text has no
+# blank lines, so this is what splits a whole extracted PDF without punkt.
+FALLBACK_BREAK_RES = (re.compile(r'[.!?]["\')\]]*\s+'), re.compile(r'\n\s*'), re.compile(r'\s+'))
+
+def _fallback_spans(text, start, end, max_chars):
+    # (start, end) pieces of text[start:end] of at most max_chars, each ending
+    # after the last break point that fits, or cut hard if there is none.
+    while end - start > max_chars:
+        limit = start + max_chars
+        piece_end = None
+        for pattern in FALLBACK_BREAK_RES:
+            for m in pattern.finditer(text, start, limit):
+                piece_end = m.end()
+            if piece_end is not None:
+                break
+        piece_end = piece_end or limit
+        yield start, piece_end
+        start = piece_end
+    yield start, end
+
+def _text_spans(text, pattern, start, end):
+    # (start, end) pieces of text[start:end], each ending after a separator match.
+    pos = start
+    for m in pattern.finditer(text, start, end):
+        yield pos, m.end()
+        pos = m.end()
+    if pos < end:
+        yield pos, end
+
+# Helper: Split text into (offset, chunk) pairs of at most max_chars.
+# Chunks break between paragraphs, or between sentences for very long
+# paragraphs; only text with no sentence, line or word break within max_chars
+# is cut mid-sentence. Joined together the chunks give back text.
+def split_into_chunks(text, max_chars=None):
+    max_chars = max_chars or GRAMMAR_CHUNK_CHARS
+    chunks = []
+    chunk_start = chunk_end = 0
+    for p_start, p_end in _text_spans(text, PARAGRAPH_END_RE, 0, len(text)):
+        if p_end - p_start <= max_chars:
+            pieces = [(p_start, p_end)]
+        else:
+            pieces = [span
+                      for s_start, s_end in _sentence_spans(text, p_start, p_end)
+                      for span in _fallback_spans(text, s_start, s_end, max_chars)]
+        for start, end in pieces:
+            if end - chunk_start > max_chars and chunk_end > chunk_start:
+                chunks.append((chunk_start, text[chunk_start:chunk_end]))
+                chunk_start = chunk_end
+            chunk_end = end
+    if chunk_end > chunk_start:
+        chunks.append((chunk_start, text[chunk_start:chunk_end]))
+    return chunks
+
+def _check_chunk(lang, offset, chunk, tool=None):
+    if tool is not None:
+        matches = tool.check(chunk)
+    else:
+        with language_tools.engine(lang) as tool:
+            matches = tool.check(chunk)
+    for match in matches:
+        match.offset += offset
+    return matches
+
+def get_grammar_executor():
+    # Created lazily so gunicorn workers do not inherit a pool from the master.
+    global grammar_executor
+    if grammar_executor is None:
+        grammar_executor = ThreadPoolExecutor(max_workers=GRAMMAR_PARALLELISM,
+                                              thread_name_prefix='grammar')
+    return grammar_executor
+
+def _correct_grammar(text, lang, tool=None):
+    chunks = split_into_chunks(text)
+    # language_tool_python fixes up offsets for 4-byte characters through
+    # class-level state on Match, which is not thread-safe.
+    if tool is not None or len(chunks) <= 1 or GRAMMAR_PARALLELISM <= 1 or any(ord(c) > 0xFFFF for c in text):
+        results = (_check_chunk(lang, offset, chunk, tool) for offset, chunk in chunks)
+    else:
+        executor = get_grammar_executor()
+        futures = [executor.submit(_check_chunk, lang, offset, chunk) for offset, chunk in chunks]
+        results = (future.result() for future in futures)
+    matches = []
+    for done, chunk_matches in enumerate(results, 1):
+        matches.extend(chunk_matches)
+        jobs.report_progress(stage='grammar', done=done, total=len(chunks))
+    return language_tool_python.utils.correct(text, matches)
+
 # Helper: Grammar Correction
+@metrics.timed('correct_grammar')
 def correct_grammar(text, lang='en'):
+    metrics.INPUT_CHARS.observe(len(text), operation='grammar')
     try:
-        tool = get_language_tool(lang)
-        matches = tool.check(text)
-        return language_tool_python.utils.correct(text, matches)
+        return cached_result('grammar', lang, text, lambda: _correct_grammar(text, lang))
     except Exception as e:
+        metrics.STAGE_ERRORS.inc(stage='correct_grammar')
         logger.error(f"GrammarTool error: {e}")
         return text
 
+# Spell-correction engines, one per language, built on first use.
+# Dictionaries are "word count" files (TextBlob's en-spelling.txt format); languages
+# other than English look for SPELL_DICTIONARY_DIR/<lang>.txt. Only English ships;
+# Hindi spell checks need a dictionaries/hi.txt, and /spell rejects languages without one.
+SPELL_DICTIONARY_DIR = os.getenv("SPELL_DICTIONARY_DIR", os.path.join(os.path.dirname(__file__), "dictionaries"))
+SPELL_CACHE_SIZE = int(os.getenv("SPELL_CACHE_SIZE", "50000"))
+spelling_engines = {}
+
+def _installed_dictionaries():
+    dictionaries = {'en': default_dictionary_path('en')}
+    if os.path.isdir(SPELL_DICTIONARY_DIR):
+        for name in os.listdir(SPELL_DICTIONARY_DIR):
+            if name.endswith('.txt'):
+                dictionaries[name[:-len('.txt')]] = os.path.join(SPELL_DICTIONARY_DIR, name)
+    return dictionaries
+
+# lang -> dictionary path. The requested language is only ever looked up here,
+# never turned into a path, and unknown languages are not remembered.
+SPELL_DICTIONARIES = _installed_dictionaries()
+
+def get_spelling_engine(lang):
+    path = SPELL_DICTIONARIES.get(lang)
+    if path is None:
+        logger.debug("No spelling dictionary for %r", lang)
+        return None
+    if lang not in spelling_engines:
+        spelling_engines[lang] = SpellingEngine.from_file(path, cache_size=SPELL_CACHE_SIZE)
+    return spelling_engines[lang]
+
 # Helper: Spell Check
-def spell_check(text):
+@metrics.timed('spell_check')
+def spell_check(text, lang='en'):
+    metrics.INPUT_CHARS.observe(len(text), operation='spell')
     try:
-        words = text.split()
-        corrected = [TextBlob(w).correct().string for w in words]
-        return " ".join(corrected)
+        engine = get_spelling_engine(lang)
+        if engine is None:
+            return text
+        # Tokens are re-joined with single spaces, so other whitespace cannot change the result.
+        return cached_result('spell', lang, " ".join(text.split()), lambda: engine.correct(text))
     except Exception as e:
+        metrics.STAGE_ERRORS.inc(stage='spell_check')
         logger.error(f"Spell check error: {e}")
         return text
 
+# Google Translate codes look like "fr", "haw" or "zh-CN".
+TRANSLATE_LANGUAGE_RE = re.compile(r'[A-Za-z]{2,3}(-[A-Za-z]{2,4})?')
+# GoogleTranslator rejects texts of 5000 characters or more; longer texts are
+# translated in chunks of at most this size.
+TRANSLATE_CHUNK_CHARS = min(int(os.getenv("TRANSLATE_CHUNK_CHARS", "4500")), 4999)
+
+# Helper: Whether an operation can run in the requested language
+def language_supported(op, lang):
+    if op == 'spell':
+        return lang in SPELL_DICTIONARIES
+    if op == 'grammar':
+        return lang in GRAMMAR_LANGUAGES
+    return TRANSLATE_LANGUAGE_RE.fullmatch(lang) is not None
+
+def _translate(text, target_lang):
+    from deep_translator import GoogleTranslator
+    translated = GoogleTranslator(source='auto', target=target_lang).translate(text)
+    if not translated:
+        raise ValueError("Translation returned empty result")
+    return translated
+
 # Helper: Translation
+@metrics.timed('translate_text')
 def translate_text(text, target_lang):
+    metrics.INPUT_CHARS.observe(len(text), operation='translate')
     try:
-        translated = GoogleTranslator(source='auto', target=target_lang).translate(text)
-        if not translated:
-            raise ValueError("Translation returned empty result")
-        return translated
+        if len(text) > TRANSLATE_CHUNK_CHARS:
+            return _translate_chunk(text, target_lang)
+        return cached_result('translate', target_lang, text, lambda: _translate(text, target_lang))
     except Exception as e:
+        metrics.STAGE_ERRORS.inc(stage='translate_text')
         logger.error(f"Translation error: {e}")
         return text
 
+def _detect_tone(text):
+    polarity = TextBlob(text).sentiment.polarity
+    if polarity > 0.2:
+        return "Positive 😊"
+    elif polarity < -0.2:
+        return "Negative 😞"
+    else:
+        return "Neutral 😐"
+
 # Helper: Tone Detection
+@metrics.timed('detect_tone')
 def detect_tone(text):
     try:
-        polarity = TextBlob(text).sentiment.polarity
-        if polarity > 0.2:
-            return "Positive 😊"
-        elif polarity < -0.2:
-            return "Negative 😞"
-        else:
-            return "Neutral 😐"
+        return cached_result('tone', None, text, lambda: _detect_tone(text))
     except Exception as e:
+        metrics.STAGE_ERRORS.inc(stage='detect_tone')
         logger.error(f"Tone detection error: {e}")
         return "Unknown"
 
-# Helper: File Content Extraction
-def extract_file_content(file):
+# NLP data used by most requests: the spelling word counts and TextBlob's
+# sentiment lexicon. gunicorn.conf.py calls this in the master when preload_app
+# is on, so workers share one copy-on-write copy instead of each loading its own.
+PRELOAD_SPELL_LANGUAGES = [l.strip() for l in os.getenv("PRELOAD_SPELL_LANGUAGES", "en").split(",") if l.strip()]
+
+def preload_models():
+    for lang in PRELOAD_SPELL_LANGUAGES:
+        get_spelling_engine(lang)
+    _detect_tone("Loading the sentiment lexicon.")
+    get_sentence_tokenizer()
+    # Move everything loaded so far out of the collector's reach; otherwise
+    # collections in the workers touch these objects and un-share their pages.
+    gc.collect()
+    gc.freeze()
+
+# Upload limits; .txt files are decoded TXT_BLOCK_BYTES at a time.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "500"))
+TXT_BLOCK_BYTES = int(os.getenv("TXT_BLOCK_BYTES", str(64 * 1024)))
+# Werkzeug spools uploads to a temp file and rejects larger bodies with 413.
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 64 * 1024
+
+class FileExtractionError(ValueError):
+    pass
+
+class FileLimitExceeded(FileExtractionError):
+    pass
+
+# Helper: Stream file content page by page (.pdf) or block by block (.txt)
+def iter_file_content(file, filename=None):
+    return metrics.timed_iter('extract_file_content', _iter_file_content(file, filename or file.filename))
+
+def _iter_file_content(file, filename):
     try:
-        if file.filename.endswith('.txt'):
-            return file.read().decode('utf-8', errors='ignore')
-        elif file.filename.endswith('.pdf'):
+        if filename.endswith('.txt'):
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+            size = 0
+            while True:
+                block = file.read(TXT_BLOCK_BYTES)
+                size += len(block)
+                if size > MAX_UPLOAD_BYTES:
+                    raise FileLimitExceeded(f"File is larger than {MAX_UPLOAD_BYTES} bytes.")
+                text = decoder.decode(block, final=not block)
+                if text:
+                    yield text
+                if not block:
+                    return
+        elif filename.endswith('.pdf'):
+            file.seek(0, os.SEEK_END)
+            if file.tell() > MAX_UPLOAD_BYTES:
+                raise FileLimitExceeded(f"File is larger than {MAX_UPLOAD_BYTES} bytes.")
+            file.seek(0)
+            import PyPDF2
             pdf = PyPDF2.PdfReader(file)
-            return "".join(page.extract_text() or "" for page in pdf.pages)
-        else:
-            return None
+            total = len(pdf.pages)
+            if total > MAX_PDF_PAGES:
+                raise FileLimitExceeded(f"PDF has {total} pages; at most {MAX_PDF_PAGES} are supported.")
+            for number, page in enumerate(pdf.pages, 1):
+                text = page.extract_text() or ""
+                # The reader caches every object it parses; dropping them after
+                # each page keeps memory flat instead of growing with the file.
+                pdf.resolved_objects.clear()
+                jobs.report_progress(stage='extract', done=number, total=total)
+                yield text
+    except FileExtractionError:
+        raise
     except Exception as e:
         logger.error(f"File processing error: {e}")
+        raise FileExtractionError('File is empty or unreadable.') from e
+
+# Helper: File Content Extraction
+def extract_file_content(file, filename=None):
+    filename = filename or file.filename
+    if not filename.endswith(('.txt', '.pdf')):
+        return None
+    try:
+        return "".join(iter_file_content(file, filename))
+    except FileExtractionError:
         return None
 
+def _translate_chunk(chunk, lang):
+    if len(chunk) > TRANSLATE_CHUNK_CHARS:
+        return "".join(_translate_chunk(piece, lang) for _, piece in split_into_chunks(chunk, TRANSLATE_CHUNK_CHARS))
+    text = chunk.rstrip()
+    if not text:
+        return chunk
+    translated = cached_result('translate', lang, text, lambda: _translate(text, lang))
+    return translated + chunk[len(text):]
+
+# Helper: Grammar-check or translate file content while it is being extracted.
+# Complete chunks go to the grammar/translation threads as soon as they are
+# available; the last, possibly unfinished chunk waits for the next page.
+def process_file_stream(pieces, lang):
+    grammar = lang in GRAMMAR_LANGUAGES
+    executor = get_grammar_executor()
+    parts, futures = [], []
+    buffer, buffer_offset = "", 0
+    chunk_chars = GRAMMAR_CHUNK_CHARS if grammar else TRANSLATE_CHUNK_CHARS
+    sequential = GRAMMAR_PARALLELISM <= 1
+
+    def submit(offset, chunk):
+        nonlocal sequential
+        if grammar:
+            if not chunk.strip():
+                task = (list,)
+            else:
+                task = (_check_chunk, lang, offset, chunk)
+                # Same restriction as correct_grammar() for 4-byte characters.
+                sequential = sequential or any(ord(c) > 0xFFFF for c in chunk)
+        else:
+            task = (_translate_chunk, chunk, lang)
+        if sequential:
+            for future in futures:
+                future.exception()
+            future = Future()
+            try:
+                future.set_result(task[0](*task[1:]))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = executor.submit(*task)
+        futures.append(future)
+
+    for piece in pieces:
+        parts.append(piece)
+        buffer += piece
+        chunks = split_into_chunks(buffer, chunk_chars)
+        if len(chunks) > 1:
+            for offset, chunk in chunks[:-1]:
+                submit(buffer_offset + offset, chunk)
+            tail = chunks[-1][0]
+            buffer_offset += tail
+            buffer = buffer[tail:]
+    if buffer:
+        submit(buffer_offset, buffer)
+    content = "".join(parts)
+
+    # Like correct_grammar()/translate_text(), a failure returns the text
+    # unchanged; 'cacheable' tells the caller not to cache that fallback.
+    cacheable = True
+    if grammar:
+        process_type = 'grammar'
+        try:
+            matches = []
+            for done, future in enumerate(futures, 1):
+                matches.extend(future.result())
+                jobs.report_progress(stage='grammar', done=done, total=len(futures))
+            result = language_tool_python.utils.correct(content, matches)
+        except Exception as e:
+            logger.error(f"GrammarTool error: {e}")
+            result, cacheable = content, False
+    else:
+        process_type = 'translation'
+        try:
+            result = "".join(future.result() for future in futures).rstrip()
+        except Exception as e:
+            logger.error(f"Translation error: {e}")
+            result, cacheable = content, False
+    tone = detect_tone(result)
+    return {'original': content, 'corrected': result, 'tone': tone,
+            'type': process_type, 'language': lang, 'cacheable': cacheable}
+
+# ---------- Background jobs ----------
+
+def init_job_worker():
+    # Runs in each job process, which imports this module afresh and starts
+    # its own LanguageTool servers; stop them when the process exits.
+    multiprocessing.util.Finalize(language_tools, language_tools.close, exitpriority=10)
+
+# Job body for async uploads; runs in a job process, so it must not touch Mongo.
+def process_upload_job(path, filename, lang, cache_key):
+    try:
+        with open(path, 'rb') as f:
+            result = process_file_stream(iter_file_content(f, filename), lang)
+        if not result['original'].strip():
+            raise FileExtractionError('File is empty or unreadable.')
+        result['cache_key'] = cache_key
+        return result
+    finally:
+        os.remove(path)
+
+def log_job_result(username, result):
+    cache_key = result.pop('cache_key')
+    if result.pop('cacheable'):
+        result_cache.set(cache_key, result)
+    activity_log.write({
+        'username': username,
+        'original': result['original'],
+        'corrected': result['corrected'],
+        'cache_key': cache_key,
+        'type': result['type'],
+        'language': result['language'],
+        'tone': result['tone']
+    })
+
+upload_jobs = jobs.JobQueue(
+    jobs_collection,
+    max_workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("JOB_QUEUE_SIZE", "20")),
+    per_user_limit=int(os.getenv("JOB_USER_LIMIT", "2")),
+    result_ttl=int(os.getenv("JOB_RESULT_TTL", "3600")),
+    job_timeout=int(os.getenv("JOB_TIMEOUT", "1800")),
+    initializer=init_job_worker,
+    on_done=log_job_result,
+    result_store=result_store,
+)
+
 # Initialize session results
 def init_session_results():
-    if 'results' not in session:
+    # Sessions from before the result store kept whole results in the cookie.
+    if 'results' not in session or any(isinstance(v, dict) for v in session['results'].values()):
         session['results'] = {
             'spell': None,
             'grammar': None,
@@ -105,6 +627,12 @@ def init_session_results():
         }
     session.modified = True
 
+# Helper: Store a result server-side and remember its id in the session
+def save_result(kind, result):
+    session['results'][kind] = result_store.put(result)
+    session.modified = True
+    return result
+
 # ---------------- ROUTES ----------------
 
 @app.route('/')
@@ -178,17 +706,26 @@ def dashboard():
         logger.warning("Unauthorized dashboard access")
         return redirect(url_for('login'))
     init_session_results()
-    logger.debug(f"Rendering dashboard for {session['user']}: {session['results']}")
-    return render_template('dashboard.html',
-                         spell_results=session['results']['spell'],
-                         grammar_results=session['results']['grammar'],
-                         translate_results=session['results']['translate'],
-                         file_results=session['results']['file'])
+    logger.debug("Rendering dashboard for %s: %s", session['user'], session['results'])
+    # Result texts are fetched from /results/<kind> when a form is opened.
+    saved = {kind: bool(result_id) for kind, result_id in session['results'].items()}
+    return render_template('dashboard.html', saved_results=saved, job_timeout=upload_jobs.job_timeout,
+                           spell_languages=SPELL_DICTIONARIES)
+
+@app.route('/results/<kind>')
+def saved_result(kind):
+    if 'user' not in session:
+        return jsonify({'error': 'Please log in to access this feature.'}), 401
+    init_session_results()
+    if kind not in session['results']:
+        return jsonify({'error': 'Unknown result type.'}), 404
+    return jsonify({'results': result_store.get(session['results'][kind])})
 
 @app.route('/logout')
 def logout():
     session.pop('user', None)
     session.pop('results', None)
+    session.pop('saved_job', None)
     logger.debug("User logged out")
     flash("Logged out successfully.")
     return redirect(url_for('login'))
@@ -201,22 +738,25 @@ def spell():
         return jsonify({'error': 'Please log in to access this feature.'}), 401
     init_session_results()
     text = request.form.get('text', '').strip()
+    lang = request.form.get('language', 'en')
     if not text:
         return jsonify({'error': 'No text provided for spell check.'}), 400
+    if not language_supported('spell', lang):
+        return jsonify({'error': 'Spell checking is not available for this language.'}), 400
     try:
-        corrected = spell_check(text)
+        corrected = spell_check(text, lang)
         tone = detect_tone(corrected)
-        session['results']['spell'] = {'original': text, 'corrected': corrected, 'tone': tone}
-        session.modified = True
-        logs_collection.insert_one({
+        results = save_result('spell', {'original': text, 'corrected': corrected, 'tone': tone})
+        activity_log.write({
             'username': session['user'],
-            'original': text,
-            'corrected': corrected,
+            **log_texts('spell', text, corrected),
             'type': 'spell',
+            'language': lang,
             'tone': tone
         })
-        logger.debug(f"Spell check: {session['results']['spell']}")
-        return jsonify({'results': session['results']['spell']})
+        if LOG_TEXT_DUMPS:
+            logger.debug("Spell check: %s", results)
+        return jsonify({'results': results})
     except Exception as e:
         logger.error(f"Spell check error: {e}")
         return jsonify({'error': f"Error processing spell check: {str(e)}"}), 500
@@ -230,21 +770,22 @@ def grammar():
     lang = request.form.get('language', 'en')
     if not text:
         return jsonify({'error': 'No text provided for grammar correction.'}), 400
+    if not language_supported('grammar', lang):
+        return jsonify({'error': 'Grammar checks are not available for this language.'}), 400
     try:
         corrected = correct_grammar(text, lang)
         tone = detect_tone(corrected)
-        session['results']['grammar'] = {'original': text, 'corrected': corrected, 'tone': tone}
-        session.modified = True
-        logs_collection.insert_one({
+        results = save_result('grammar', {'original': text, 'corrected': corrected, 'tone': tone})
+        activity_log.write({
             'username': session['user'],
-            'original': text,
-            'corrected': corrected,
+            **log_texts('grammar', text, corrected),
             'type': 'grammar',
             'language': lang,
             'tone': tone
         })
-        logger.debug(f"Grammar check: {session['results']['grammar']}")
-        return jsonify({'results': session['results']['grammar']})
+        if LOG_TEXT_DUMPS:
+            logger.debug("Grammar check: %s", results)
+        return jsonify({'results': results})
     except Exception as e:
         logger.error(f"Grammar check error: {e}")
         return jsonify({'error': f"Error processing grammar check: {str(e)}"}), 500
@@ -261,18 +802,17 @@ def translate():
     try:
         translated = translate_text(text, target_lang)
         tone = detect_tone(translated)
-        session['results']['translate'] = {'original': text, 'corrected': translated, 'tone': tone}
-        session.modified = True
-        logs_collection.insert_one({
+        results = save_result('translate', {'original': text, 'corrected': translated, 'tone': tone})
+        activity_log.write({
             'username': session['user'],
-            'original': text,
-            'corrected': translated,
+            **log_texts('translate', text, translated),
             'type': 'translation',
             'target_lang': target_lang,
             'tone': tone
         })
-        logger.debug(f"Translate: {session['results']['translate']}")
-        return jsonify({'results': session['results']['translate']})
+        if LOG_TEXT_DUMPS:
+            logger.debug("Translate: %s", results)
+        return jsonify({'results': results})
     except Exception as e:
         logger.error(f"Translate error: {e}")
         return jsonify({'error': f"Error processing translation: {str(e)}"}), 500
@@ -288,32 +828,328 @@ def upload():
     lang = request.form.get('language', 'en')
     if not file.filename.endswith(('.txt', '.pdf')):
         return jsonify({'error': 'Only .txt or .pdf files are supported.'}), 400
-    content = extract_file_content(file)
-    if not content or not content.strip():
-        return jsonify({'error': 'File is empty or unreadable.'}), 400
+    # Identical files (e.g. retried uploads) are answered from the cache.
+    cache_key = make_key('file', lang, file_digest(file))
+    result = result_cache.get(cache_key)
+    g.setdefault('cache_lookups', {})['file'] = (cache_key, result is not None)
+    if result is None and request.form.get('async') == '1':
+        return submit_upload_job(file, lang, cache_key)
     try:
-        if lang in ['en', 'hi']:
-            result = correct_grammar(content, lang)
-            process_type = 'grammar'
-        else:
-            result = translate_text(content, lang)
-            process_type = 'translation'
-        tone = detect_tone(result)
-        session['results']['file'] = {'original': content, 'corrected': result, 'tone': tone}
-        session.modified = True
-        logs_collection.insert_one({
+        if result is None:
+            result = process_file_stream(iter_file_content(file), lang)
+            if result.pop('cacheable'):
+                result_cache.set(cache_key, result)
+        content = result['original']
+        if not content.strip():
+            return jsonify({'error': 'File is empty or unreadable.'}), 400
+        results = save_result('file', {'original': content, 'corrected': result['corrected'], 'tone': result['tone']})
+        activity_log.write({
             'username': session['user'],
-            'original': content,
-            'corrected': result,
-            'type': process_type,
+            **log_texts('file', content, result['corrected']),
+            'type': result['type'],
             'language': lang,
-            'tone': tone
+            'tone': result['tone']
         })
-        logger.debug(f"File upload: {session['results']['file']}")
-        return jsonify({'results': session['results']['file']})
+        if LOG_TEXT_DUMPS:
+            logger.debug("File upload: %s", results)
+        return jsonify({'results': results})
+    except FileLimitExceeded as e:
+        return jsonify({'error': str(e)}), 413
+    except FileExtractionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"File upload error: {e}")
+        return jsonify({'error': f"Error processing file upload: {str(e)}"}), 500
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    return jsonify({'error': f"File is larger than {MAX_UPLOAD_BYTES} bytes."}), 413
+
+def submit_upload_job(file, lang, cache_key):
+    suffix = os.path.splitext(file.filename)[1]
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, 'wb') as f:
+        file.save(f)
+    try:
+        job_id = upload_jobs.submit(session['user'], process_upload_job, path, file.filename, lang, cache_key)
+    except (jobs.QueueFull, jobs.UserLimitReached) as e:
+        os.remove(path)
+        return jsonify({'error': str(e)}), 429
     except Exception as e:
+        os.remove(path)
         logger.error(f"File upload error: {e}")
         return jsonify({'error': f"Error processing file upload: {str(e)}"}), 500
+    logger.debug(f"Queued upload job {job_id} for {session['user']}")
+    return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    if 'user' not in session:
+        return jsonify({'error': 'Please log in to access this feature.'}), 401
+    job = upload_jobs.get(job_id)
+    if job is None or job['username'] != session['user']:
+        return jsonify({'error': 'Job not found.'}), 404
+    response = {'job_id': job_id, 'status': job['status'], 'progress': job.get('progress')}
+    if job['status'] == 'done':
+        result = upload_jobs.result(job)
+        if result is None:
+            response.update(status='failed', error='The result is no longer available.')
+            return jsonify(response)
+        response['results'] = {'original': result['original'], 'corrected': result['corrected'], 'tone': result['tone']}
+        if session.get('saved_job') != job_id:
+            init_session_results()
+            try:
+                save_result('file', response['results'])
+                session['saved_job'] = job_id
+            except Exception as e:
+                # The result is still returned; it just will not reappear on the dashboard.
+                logger.error(f"Could not save job result {job_id}: {e}")
+    elif job['status'] == 'failed':
+        response['error'] = job.get('error')
+    return jsonify(response)
+
+# ---------- Batch API ----------
+
+# Machine clients authenticate with "Authorization: Bearer <token>".
+# API_TOKENS="client-a:token-a,client-b:token-b"
+API_TOKENS = {}
+for entry in os.getenv("API_TOKENS", "").split(','):
+    if ':' in entry:
+        client_name, token = entry.strip().split(':', 1)
+        token = token.strip()
+        if token:
+            API_TOKENS[token] = client_name.strip()
+API_BATCH_MAX = int(os.getenv("API_BATCH_MAX", "1000"))
+BATCH_OPERATIONS = ('spell', 'grammar', 'translate')
+
+def api_client():
+    auth = request.headers.get('Authorization', '')
+    if not auth.startswith('Bearer '):
+        return None
+    token = auth[len('Bearer '):].strip()
+    if not token:
+        return None
+    for known, client in API_TOKENS.items():
+        if secrets.compare_digest(known, token):
+            return client
+    return None
+
+# Results a batch adds to the cache are logged in full under their cache_key,
+# like the form endpoints do, so that later cache hits can log only the key.
+def _batch_logger(client, op, lang):
+    def log(key, original, corrected):
+        activity_log.write({
+            'username': client,
+            'original': original,
+            'corrected': corrected,
+            'cache_key': key,
+            'type': 'translation' if op == 'translate' else op,
+            'language': lang,
+            'batch': True,
+        })
+    return log
+
+def _batch_spell(lang, texts, log):
+    engine = get_spelling_engine(lang)
+    results = {}
+    for text in texts:
+        if engine is None:
+            results[text] = ('result', text)
+        else:
+            results[text] = ('result', cached_result('spell', lang, " ".join(text.split()), lambda: engine.correct(text),
+                                                     on_store=lambda key, value: log(key, text, value)))
+    return results
+
+def _batch_grammar(lang, texts, log):
+    # One engine checkout for every text in this language.
+    results = {}
+    with language_tools.engine(lang) as tool:
+        for text in texts:
+            try:
+                results[text] = ('result', cached_result('grammar', lang, text, lambda: _correct_grammar(text, lang, tool),
+                                                         on_store=lambda key, value: log(key, text, value)))
+            except Exception as e:
+                logger.error(f"GrammarTool error: {e}")
+                results[text] = ('error', str(e))
+    return results
+
+def _batch_translate(lang, texts, log):
+    results, pending = {}, []
+    for text in texts:
+        cached = result_cache.get(make_key('translate', lang, text))
+        if cached is not None:
+            results[text] = ('result', cached)
+        else:
+            pending.append(text)
+    if not pending:
+        return results
+    from deep_translator import GoogleTranslator
+    translator = GoogleTranslator(source='auto', target=lang)
+    try:
+        translated = translator.translate_batch(pending)
+    except Exception as e:
+        # Retry one by one so that only the failing items report an error.
+        logger.warning(f"Batch translation failed, retrying per item: {e}")
+        translated = []
+        for text in pending:
+            try:
+                translated.append(translator.translate(text))
+            except Exception as item_error:
+                translated.append(item_error)
+    for text, value in zip(pending, translated):
+        if isinstance(value, Exception) or not value:
+            results[text] = ('error', str(value) if value else 'Translation returned empty result')
+        else:
+            key = make_key('translate', lang, text)
+            result_cache.set(key, value)
+            log(key, text, value)
+            results[text] = ('result', value)
+    return results
+
+BATCH_HANDLERS = {'spell': _batch_spell, 'grammar': _batch_grammar, 'translate': _batch_translate}
+
+def _batch_item_error(item):
+    if not isinstance(item, dict):
+        return 'Item must be an object.'
+    if item.get('op') not in BATCH_OPERATIONS:
+        return f"op must be one of {', '.join(BATCH_OPERATIONS)}."
+    if not isinstance(item.get('text'), str) or not item['text'].strip():
+        return 'text must be a non-empty string.'
+    lang = item.get('language', 'en')
+    if not isinstance(lang, str):
+        return 'language must be a string.'
+    if not language_supported(item['op'], lang):
+        return f"language is not supported for {item['op']}."
+    return None
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    client = api_client()
+    if client is None:
+        return jsonify({'error': 'Invalid or missing API token.'}), 401
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('items'), list):
+        return jsonify({'error': 'Body must be a JSON object with an "items" array.'}), 400
+    items = payload['items']
+    if len(items) > API_BATCH_MAX:
+        return jsonify({'error': f"At most {API_BATCH_MAX} items per batch."}), 413
+    with_tone = bool(payload.get('tone', False))
+
+    # Identical (op, language, text) items are processed once; work is grouped
+    # by (op, language) in order of first appearance.
+    keys, groups, errors = [], {}, {}
+    for index, item in enumerate(items):
+        error = _batch_item_error(item)
+        if error:
+            keys.append(('invalid', index))
+            errors[('invalid', index)] = ('error', error)
+            continue
+        lang = item.get('language', 'en')
+        text = item['text'].strip()
+        keys.append((item['op'], lang, text))
+        groups.setdefault((item['op'], lang), {})[text] = None
+
+    activity_log.write({
+        'username': client,
+        'type': 'batch',
+        'items': len(items),
+        'unique': sum(len(texts) for texts in groups.values()),
+        'operations': {op: sum(len(t) for (o, _), t in groups.items() if o == op) for op in BATCH_OPERATIONS},
+    })
+
+    def generate():
+        outcomes = dict(errors)
+        pending_groups = iter(groups.items())
+        for index, key in enumerate(keys):
+            # Process groups until this item's result is known, so lines go out in order.
+            while key not in outcomes:
+                (op, lang), texts = next(pending_groups)
+                try:
+                    group_results = BATCH_HANDLERS[op](lang, list(texts), _batch_logger(client, op, lang))
+                except Exception as e:
+                    logger.error(f"Batch {op} error: {e}")
+                    group_results = {text: ('error', str(e)) for text in texts}
+                for text, outcome in group_results.items():
+                    outcomes[(op, lang, text)] = outcome
+            kind, value = outcomes[key]
+            line = {'index': index}
+            if isinstance(items[index], dict) and 'id' in items[index]:
+                line['id'] = items[index]['id']
+            if kind == 'error':
+                line['error'] = value
+            else:
+                line['result'] = value
+                if with_tone:
+                    line['tone'] = detect_tone(value)
+            yield json.dumps(line) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+# ---------- Metrics ----------
+
+slow_requests = metrics.SlowRequestRecorder(
+    keep=int(os.getenv("PROFILE_SLOWEST_N", "0")),
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.profiler = slow_requests.start_profile()
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        duration = time.perf_counter() - started
+        metrics.REQUEST_SECONDS.observe(duration, endpoint=request.endpoint or 'unknown', status=response.status_code)
+        slow_requests.record(request.method, request.path, response.status_code, duration, g.pop('profiler', None))
+    return response
+
+def _stat_samples(stats, keys):
+    def read():
+        values = stats()
+        return [((key,), values[key]) for key in keys]
+    return read
+
+metrics.REGISTRY.collector('spellapp_result_cache_events_total', 'Result cache lookups and evictions.',
+                           'counter', ['event'], _stat_samples(result_cache.stats, ['hits', 'disk_hits', 'misses', 'evictions']))
+metrics.REGISTRY.collector('spellapp_result_cache_bytes', 'Bytes held in the in-process result cache.',
+                           'gauge', [], lambda: [((), result_cache.stats()['bytes'])])
+metrics.REGISTRY.collector('spellapp_grammar_pool_events_total', 'LanguageTool pool checkouts and restarts.',
+                           'counter', ['event'], _stat_samples(language_tools.stats, ['hits', 'misses', 'restarts', 'evictions']))
+metrics.REGISTRY.collector('spellapp_grammar_pool_engines', 'LanguageTool engines in the pool.',
+                           'gauge', ['state'], _stat_samples(language_tools.stats, ['idle', 'in_use']))
+metrics.REGISTRY.collector('spellapp_activity_log_records', 'Activity log records by state.',
+                           'gauge', ['state'], _stat_samples(activity_log.stats, ['queued', 'written', 'spilled']))
+metrics.REGISTRY.collector('spellapp_spelling_cache_events_total', 'Spelling engine token cache lookups.',
+                           'counter', ['lang', 'event'],
+                           lambda: [((lang, event), engine.stats()[f'cache_{event}'])
+                                    for lang, engine in list(spelling_engines.items()) if engine
+                                    for event in ('hits', 'misses')])
+metrics.REGISTRY.collector('spellapp_jobs_pending', 'Upload jobs queued or running in this worker.',
+                           'gauge', [], lambda: [((), upload_jobs.stats()['pending'])])
+
+# Metrics are per worker process.
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/slowest')
+def slowest_requests():
+    return jsonify(slow_requests.slowest())
+
+@app.route('/health/grammar-pool')
+def grammar_pool_health():
+    return jsonify(language_tools.stats())
+
+@app.route('/health/cache')
+def cache_health():
+    return jsonify(result_cache.stats())
+
+@app.route('/health/activity-log')
+def activity_log_health():
+    return jsonify(activity_log.stats())
 
 # ---------------------------------------------------
 
@@ -0,0 +1,520 @@
+# Reproducible benchmarks for the processing helpers and endpoints.
+#
+#   python benchmark.py --output baseline.json
+#   python benchmark.py --baseline baseline.json --threshold 0.2
+#
+# Part one times spell_check, correct_grammar, detect_tone and
+# extract_file_content over a fixed, seeded corpus (short text, a paragraph,
+# multi-page .txt and .pdf files). Part two is a load test of the Flask app
+# through its test client at a configurable concurrency, reporting
+# p50/p95/p99 latency, requests per second and peak RSS.
+#
+# Runs offline: Mongo is replaced by mongomock (pip install mongomock) and
+# GoogleTranslator by a local stub. LanguageTool needs Java, so grammar cases
+# are skipped when no java binary is found (see --grammar).
+# --startup measures cold-start time and per-worker memory with and without
+# preload_models(), the way gunicorn workers start with and without --preload.
+# Results are printed as JSON; with --baseline, p50/p95 latencies, RPS and peak
+# RSS are compared against an earlier run and the exit status is 1 when any of
+# them is worse by more than --threshold.
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SEED = 1234
+MISSPELL_RATE = 0.12
+WORDS_PER_PAGE = 400
+LINES_PER_PDF_PAGE = 40
+
+BASE_TEXT = (
+    "Writing clearly is a skill that improves with practice. Most people "
+    "send several messages every day, and small mistakes in spelling or "
+    "grammar can change how a reader understands them. A careful writer reads "
+    "each sentence again before sending it, checks that the tone matches the "
+    "situation, and removes words that do not add meaning. Reports, letters "
+    "and short notes all benefit from the same habits. When the message is "
+    "important, it helps to wait a few minutes and then read it once more, "
+    "because errors that were invisible at first often become obvious later. "
+    "Good tools make this easier, but they work best when the writer still "
+    "thinks about the person who will read the text."
+)
+
+
+# ---------- corpus ----------
+
+def _misspell(word, rng):
+    i = rng.randrange(len(word) - 1)
+    edit = rng.choice(('delete', 'transpose', 'replace'))
+    if edit == 'delete':
+        return word[:i] + word[i + 1:]
+    if edit == 'transpose':
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice('abcdefghijklmnopqrstuvwxyz') + word[i + 1:]
+
+
+def make_text(n_words, seed=SEED):
+    # The same seed always gives the same text, misspellings included.
+    rng = random.Random(seed)
+    base = BASE_TEXT.split()
+    words = []
+    for i in range(n_words):
+        word = base[i % len(base)]
+        if word.isalpha() and len(word) > 3 and rng.random() < MISSPELL_RATE:
+            word = _misspell(word, rng)
+        words.append(word)
+        if i % 80 == 79:
+            words.append("\n\n")
+    return " ".join(words).replace(" \n\n ", "\n\n").strip()
+
+
+def make_pdf(pages):
+    # Minimal uncompressed PDF with one Helvetica text stream per page.
+    # pages is a list of lists of lines; lines must not contain ( ) or \.
+    n = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>"
+         % (" ".join(f"{4 + 2 * i} 0 R" for i in range(n)), n)).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        stream = ("BT /F1 10 Tf 40 800 Td 12 TL "
+                  + " ".join(f"({line}) '" for line in lines) + " ET").encode('latin-1', 'replace')
+        objects.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                        "/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)).encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def build_corpus(pages):
+    short = make_text(12)
+    paragraph = make_text(120)
+    document = make_text(pages * WORDS_PER_PAGE)
+    words = document.split()
+    per_line = max(1, WORDS_PER_PAGE // LINES_PER_PDF_PAGE)
+    lines = [" ".join(words[i:i + per_line]) for i in range(0, len(words), per_line)]
+    pdf_pages = [lines[i:i + LINES_PER_PDF_PAGE] for i in range(0, len(lines), LINES_PER_PDF_PAGE)]
+    return {
+        'texts': {'short': short, 'paragraph': paragraph, 'pages': document},
+        'files': {'txt': ('document.txt', document.encode('utf-8')),
+                  'pdf': ('document.pdf', make_pdf(pdf_pages))},
+    }
+
+
+# ---------- offline app ----------
+
+class StubTranslator:
+    # Stands in for deep_translator.GoogleTranslator; --translate-latency adds
+    # a fixed delay per call to model the network round trip.
+    latency = 0.0
+
+    def __init__(self, source='auto', target='en', **kwargs):
+        self.source = source
+        self.target = target
+
+    def translate(self, text, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return f"[{self.target}] {text}"
+
+    def translate_batch(self, batch, **kwargs):
+        return [self.translate(text) for text in batch]
+
+
+def patch_offline(args):
+    # Must run before app is imported.
+    os.environ['MONGO_URI'] = 'mongodb://localhost:27017'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    import mongomock
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+    StubTranslator.latency = args.translate_latency / 1000
+    # A stand-in module, so the real deep_translator is never imported.
+    sys.modules['deep_translator'] = types.SimpleNamespace(GoogleTranslator=StubTranslator)
+
+
+def load_app(args):
+    patch_offline(args)
+    import app
+    from cache import ResultCache
+    if not args.cache:
+        # Nothing fits in a zero-byte cache, so every call does the work.
+        app.result_cache = ResultCache(max_bytes=0)
+    return app
+
+
+def grammar_available(mode):
+    if mode == 'auto':
+        return shutil.which('java') is not None
+    return mode == 'on'
+
+
+# ---------- measurements ----------
+
+def percentile(values, q):
+    # Nearest-rank percentile of an already sorted list.
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+def summarize(seconds):
+    seconds = sorted(seconds)
+    return {
+        'n': len(seconds),
+        'mean': round(sum(seconds) / len(seconds), 6),
+        'min': round(seconds[0], 6),
+        'p50': round(percentile(seconds, 50), 6),
+        'p95': round(percentile(seconds, 95), 6),
+        'p99': round(percentile(seconds, 99), 6),
+        'max': round(seconds[-1], 6),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def stage_errors(metrics, stage):
+    # The helpers fall back to the input text on failure; the stage error
+    # counter is the only way to notice that a benchmark measured a fallback.
+    return sum(value for _, _, key, value in metrics.STAGE_ERRORS.samples() if key == (stage,))
+
+
+def time_calls(fn, repeat, warmup, reset=None):
+    for _ in range(warmup):
+        fn()
+    seconds = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return summarize(seconds)
+
+
+def clear_spelling_caches(app):
+    # The engines' token -> correction LRU would otherwise turn every timed
+    # spell_check call after warm-up into cache hits.
+    for engine in app.spelling_engines.values():
+        if engine is not None:
+            engine.correct_token.cache_clear()
+
+
+def run_micro(app, corpus, args, grammar):
+    import metrics
+    reset = None if args.cache else (lambda: clear_spelling_caches(app))
+    cases = []
+    for size, text in corpus['texts'].items():
+        cases.append(('spell_check', size, lambda text=text: app.spell_check(text, 'en')))
+        if grammar:
+            cases.append(('correct_grammar', size, lambda text=text: app.correct_grammar(text, 'en')))
+        cases.append(('detect_tone', size, lambda text=text: app.detect_tone(text)))
+    for kind, (filename, data) in corpus['files'].items():
+        def extract(filename=filename, data=data):
+            if app.extract_file_content(io.BytesIO(data), filename) is None:
+                raise RuntimeError(f"Could not extract {filename}")
+        cases.append(('extract_file_content', kind, extract))
+
+    results = {}
+    for stage, size, fn in cases:
+        errors = stage_errors(metrics, stage)
+        stats = time_calls(fn, args.repeat, args.warmup, reset)
+        stats['errors'] = stage_errors(metrics, stage) - errors
+        results[f"{stage}/{size}"] = stats
+        print(f"  {stage}/{size}: p50 {stats['p50'] * 1000:.2f} ms", file=sys.stderr)
+    return results
+
+
+def load_scenarios(corpus, grammar):
+    paragraph = corpus['texts']['paragraph']
+
+    def form(endpoint, language):
+        return lambda: ('/' + endpoint, {'text': paragraph, 'language': language})
+
+    def upload(kind):
+        filename, data = corpus['files'][kind]
+        # Uploads are translated so that they do not depend on LanguageTool.
+        return lambda: ('/upload', {'file': (io.BytesIO(data), filename), 'language': 'fr'})
+
+    scenarios = {'spell': form('spell', 'en'), 'translate': form('translate', 'fr')}
+    if grammar:
+        scenarios['grammar'] = form('grammar', 'en')
+    scenarios['upload_txt'] = upload('txt')
+    scenarios['upload_pdf'] = upload('pdf')
+    return scenarios
+
+
+def run_load(app, scenarios, args):
+    local = threading.local()
+    # Every spell request posts the same paragraph; without --cache the token
+    # caches are cleared before each one so it does the correction work again.
+    reset = None if args.cache else (lambda: clear_spelling_caches(app))
+
+    def client():
+        # One logged-in test client per worker thread.
+        if not hasattr(local, 'client'):
+            local.client = app.app.test_client()
+            with local.client.session_transaction() as s:
+                s['user'] = 'benchmark'
+        return local.client
+
+    def call(make_request):
+        path, data = make_request()
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        response = client().post(path, data=data)
+        return time.perf_counter() - start, response.status_code
+
+    results = {}
+    names = [n for n in args.scenarios.split(',') if n] if args.scenarios else list(scenarios) + ['mixed']
+    for name in names:
+        if name == 'mixed':
+            mix = list(scenarios.values())
+            requests = [mix[i % len(mix)] for i in range(args.requests)]
+        elif name in scenarios:
+            requests = [scenarios[name]] * args.requests
+        else:
+            print(f"  {name}: unknown or unavailable scenario, skipped", file=sys.stderr)
+            continue
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for make_request in requests[:args.concurrency]:
+                call(make_request)   # warm up each path before timing
+            start = time.perf_counter()
+            outcomes = list(pool.map(call, requests))
+            elapsed = time.perf_counter() - start
+        stats = summarize([seconds for seconds, _ in outcomes])
+        stats.update({
+            'concurrency': args.concurrency,
+            'errors': sum(1 for _, status in outcomes if status != 200),
+            'rps': round(len(outcomes) / elapsed, 2),
+            'peak_rss_mb': peak_rss_mb(),
+        })
+        results[name] = stats
+        print(f"  {name}: p95 {stats['p95'] * 1000:.1f} ms, {stats['rps']} req/s", file=sys.stderr)
+    return results
+
+
+# ---------- startup ----------
+
+def memory_mb():
+    # Resident and private (not shared with the parent) memory, Linux only.
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[0].endswith(':'):
+                    values[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        return {'rss_mb': None, 'private_mb': None}
+    return {'rss_mb': round(values['Rss'], 1),
+            'private_mb': round(values['Private_Clean'] + values['Private_Dirty'], 1)}
+
+
+def startup_probe(args):
+    # Runs in a fresh interpreter. Imports the app (plus preload_models() for
+    # 'preload', as the gunicorn master does), then forks --workers children
+    # that each answer a first spell check and tone detection like a new worker.
+    patch_offline(args)
+    start = time.perf_counter()
+    import app
+    report = {'import_seconds': round(time.perf_counter() - start, 4)}
+    if args.startup_probe == 'preload':
+        start = time.perf_counter()
+        app.preload_models()
+        report['preload_seconds'] = round(time.perf_counter() - start, 4)
+    report['master'] = memory_mb()
+    text = make_text(120)
+
+    children = []
+    for _ in range(args.workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            start = time.perf_counter()
+            app.spell_check(text, 'en')
+            app.detect_tone(text)
+            result = {'first_request_seconds': time.perf_counter() - start, **memory_mb()}
+            with os.fdopen(write_fd, 'w') as f:
+                json.dump(result, f)
+            os._exit(0)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+    workers = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd) as f:
+            workers.append(json.load(f))
+        os.waitpid(pid, 0)
+
+    report['workers'] = len(workers)
+    for key in ('first_request_seconds', 'rss_mb', 'private_mb'):
+        values = [w[key] for w in workers if w[key] is not None]
+        report[f'worker_{key}'] = round(sum(values) / len(values), 4) if values else None
+    print(json.dumps(report))
+    return 0
+
+
+def run_startup(args):
+    results = {}
+    for mode in ('lazy', 'preload'):
+        probe = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--startup-probe', mode, '--workers', str(args.workers)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+        results[mode] = json.loads(probe.stdout.strip().splitlines()[-1])
+        print(f"  {mode}: import {results[mode]['import_seconds']:.2f} s, "
+              f"worker private {results[mode]['worker_private_mb']} MB, "
+              f"first request {results[mode]['worker_first_request_seconds'] * 1000:.0f} ms", file=sys.stderr)
+    return results
+
+
+# ---------- baseline comparison ----------
+
+def _worse(name, metric, old, new, threshold, higher_is_better=False):
+    if not old or new is None:
+        return None
+    change = (old - new) / old if higher_is_better else (new - old) / old
+    if change > threshold:
+        return f"{name} {metric}: {old} -> {new} ({change:+.1%} worse)"
+    return None
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for name, stats in current.get('micro', {}).items():
+        old = baseline.get('micro', {}).get(name)
+        if old:
+            regressions.append(_worse(f"micro {name}", 'p50', old['p50'], stats['p50'], threshold))
+    for name, stats in current.get('load', {}).items():
+        old = baseline.get('load', {}).get(name)
+        if old:
+            regressions.append(_worse(f"load {name}", 'p95', old['p95'], stats['p95'], threshold))
+            regressions.append(_worse(f"load {name}", 'rps', old['rps'], stats['rps'], threshold,
+                                      higher_is_better=True))
+    for mode, stats in current.get('startup', {}).items():
+        old = baseline.get('startup', {}).get(mode)
+        if old:
+            for metric in ('import_seconds', 'worker_private_mb', 'worker_first_request_seconds'):
+                regressions.append(_worse(f"startup {mode}", metric, old.get(metric), stats.get(metric), threshold))
+    regressions.append(_worse('process', 'peak_rss_mb', baseline.get('peak_rss_mb'),
+                              current.get('peak_rss_mb'), threshold))
+    return [r for r in regressions if r]
+
+
+# ---------- main ----------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the processing helpers and endpoints offline.")
+    parser.add_argument('--repeat', type=int, default=20, help="timed calls per micro-benchmark")
+    parser.add_argument('--warmup', type=int, default=2, help="untimed calls before each micro-benchmark")
+    parser.add_argument('--pages', type=int, default=10, help="pages in the multi-page .txt/.pdf inputs")
+    parser.add_argument('--requests', type=int, default=200, help="requests per load scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent clients in the load test")
+    parser.add_argument('--scenarios', default='',
+                        help="comma-separated load scenarios (spell, grammar, translate, upload_txt, "
+                             "upload_pdf, mixed); all by default")
+    parser.add_argument('--translate-latency', type=float, default=0.0,
+                        help="simulated translator round trip in milliseconds")
+    parser.add_argument('--grammar', choices=('auto', 'on', 'off'), default='auto',
+                        help="include LanguageTool cases (auto: only if java is installed)")
+    parser.add_argument('--cache', action='store_true',
+                        help="keep the result cache and the spelling token cache warm")
+    parser.add_argument('--startup', action='store_true',
+                        help="also measure cold start and per-worker memory, with and without preloading")
+    parser.add_argument('--workers', type=int, default=4, help="forked workers in the startup benchmark")
+    parser.add_argument('--startup-probe', choices=('lazy', 'preload'), help=argparse.SUPPRESS)
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON file from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed relative slowdown before a result counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.startup_probe:
+        return startup_probe(args)
+    if args.startup:
+        # Before load_app(), so that the probes are the only ones importing the app cold.
+        print("startup:", file=sys.stderr)
+        startup = run_startup(args)
+    app = load_app(args)
+    grammar = grammar_available(args.grammar)
+    corpus = build_corpus(args.pages)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': SEED,
+            'args': vars(args),
+        },
+        'skipped': {} if grammar else {'correct_grammar': 'LanguageTool unavailable (no java)',
+                                       'grammar': 'LanguageTool unavailable (no java)'},
+    }
+    if not args.skip_micro:
+        print("micro-benchmarks:", file=sys.stderr)
+        report['micro'] = run_micro(app, corpus, args, grammar)
+    if not args.skip_load:
+        print("load test:", file=sys.stderr)
+        report['load'] = run_load(app, load_scenarios(corpus, grammar), args)
+    if args.startup:
+        report['startup'] = startup
+    report['peak_rss_mb'] = peak_rss_mb()
+    app.activity_log.close()
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        report['comparison'] = {'baseline': args.baseline, 'threshold': args.threshold,
+                                'regressions': regressions}
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
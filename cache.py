@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(op, lang, data):
+    # Content address of one operation: op, language and the input (str or bytes).
+    h = hashlib.sha256(f"{op}\0{lang or ''}\0".encode('utf-8'))
+    h.update(data if isinstance(data, bytes) else data.encode('utf-8'))
+    return f"{op}:{h.hexdigest()}"
+
+
+def file_digest(file, block_size=64 * 1024):
+    # Hash an uploaded file without reading it into memory, then rewind it.
+    h = hashlib.sha256()
+    while True:
+        block = file.read(block_size)
+        if not block:
+            break
+        h.update(block)
+    file.seek(0)
+    return h.hexdigest().encode('ascii')
+
+
+# Two-tier cache for processing results, keyed by make_key().
+# Tier 1 is an in-process LRU bounded by the size of the stored JSON; tier 2 is an
+# optional SQLite file that every gunicorn worker on the host can share.
+# Entries expire after a per-operation TTL (the part of the key before ':').
+class ResultCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttls=None, default_ttl=3600, disk_path=None):
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.disk_path = disk_path
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (payload, expires_at)
+        self._bytes = 0
+        self._local = threading.local()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+
+    def _ttl(self, key):
+        return self.ttls.get(key.split(':', 1)[0], self.default_ttl)
+
+    # ---------- disk tier ----------
+
+    def _db(self):
+        # One connection per thread and process; sqlite connections do not survive fork().
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.disk_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS results "
+                         "(key TEXT PRIMARY KEY, payload TEXT, expires_at REAL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _disk_get(self, key, now):
+        try:
+            row = self._db().execute("SELECT payload, expires_at FROM results WHERE key = ?",
+                                     (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Result cache read failed: {e}")
+            return None
+        if row is None or row[1] < now:
+            return None
+        return row
+
+    def _disk_set(self, key, payload, expires_at):
+        try:
+            with self._db() as conn:
+                conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                             (key, payload, expires_at))
+        except sqlite3.Error as e:
+            logger.error(f"Result cache write failed: {e}")
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, exp) in self._entries.items() if exp < now]:
+                self._bytes -= len(self._entries.pop(key)[0])
+        if self.disk_path:
+            try:
+                with self._db() as conn:
+                    conn.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+            except sqlite3.Error as e:
+                logger.error(f"Result cache purge failed: {e}")
+
+    # ---------- memory tier ----------
+
+    def _remember(self, key, payload, expires_at):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (payload, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    # ---------- public API ----------
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[0])
+        if self.disk_path:
+            row = self._disk_get(key, now)
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.disk_hits += 1
+                return json.loads(row[0])
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        payload = json.dumps(value)
+        expires_at = time.time() + self._ttl(key)
+        self._remember(key, payload, expires_at)
+        if self.disk_path:
+            self._disk_set(key, payload, expires_at)
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.purge_expired()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
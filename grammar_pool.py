@@ -0,0 +1,227 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+# Bounded pool of LanguageTool engines keyed by language code.
+# Each engine owns a Java server, so engines are reused across requests
+# instead of being started (and leaked) once per call. Engines are keyed by the
+# language they actually run (engine.language); a requested code that starts
+# another language (e.g. the factory's en-US fallback) becomes an alias for it.
+class LanguageToolPool:
+    def __init__(self, factory, max_per_language=2, max_total=4,
+                 idle_timeout=600, checkout_timeout=30):
+        self._factory = factory
+        self.max_per_language = max_per_language
+        self.max_total = max_total
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._cond = threading.Condition()
+        self._idle = {}      # lang -> list of (engine, last_used)
+        self._busy = {}      # lang -> number of engines checked out
+        self._aliases = {}   # requested lang -> language the engine runs
+        self.hits = 0
+        self.misses = 0
+        self.restarts = 0
+        self.evictions = 0
+        self._reaper_pid = None
+        self._reaper_stop = threading.Event()
+
+    # ---------- internal helpers (caller holds the lock) ----------
+
+    def _count(self, lang):
+        return len(self._idle.get(lang, [])) + self._busy.get(lang, 0)
+
+    def _total(self):
+        return sum(len(v) for v in self._idle.values()) + sum(self._busy.values())
+
+    def _pop_oldest_idle(self, exclude=None):
+        oldest_lang, oldest_at = None, None
+        for lang, engines in self._idle.items():
+            if lang == exclude or not engines:
+                continue
+            if oldest_at is None or engines[0][1] < oldest_at:
+                oldest_lang, oldest_at = lang, engines[0][1]
+        if oldest_lang is None:
+            return None
+        return self._idle[oldest_lang].pop(0)[0]
+
+    def _collect_idle(self, now):
+        expired = []
+        for lang, engines in self._idle.items():
+            keep = []
+            for engine, last_used in engines:
+                if now - last_used > self.idle_timeout:
+                    expired.append(engine)
+                else:
+                    keep.append((engine, last_used))
+            self._idle[lang] = keep
+        self.evictions += len(expired)
+        return expired
+
+    def _ensure_reaper(self):
+        # Idle engines are also evicted while no requests come in; the thread
+        # is started on first checkin so that each forked process gets its own.
+        if self._reaper_pid == os.getpid():
+            return
+        self._reaper_pid = os.getpid()
+        self._reaper_stop = threading.Event()
+        threading.Thread(target=self._reap, args=(self._reaper_stop,),
+                         name='languagetool-reaper', daemon=True).start()
+
+    def _reap(self, stop):
+        interval = max(1, min(60, self.idle_timeout / 2))
+        while not stop.wait(interval):
+            self.evict_idle()
+
+    @staticmethod
+    def _is_healthy(engine):
+        # Remote servers are managed elsewhere; local ones must still be running.
+        if getattr(engine, 'is_remote', False):
+            return True
+        is_alive = getattr(engine, '_server_is_alive', None)
+        return is_alive() if is_alive else True
+
+    @staticmethod
+    def _language_of(engine, lang):
+        language = getattr(engine, 'language', None)
+        return str(language) if language is not None else lang
+
+    @staticmethod
+    def _close(engine):
+        try:
+            engine.close()
+        except Exception as e:
+            logger.error(f"Failed to close LanguageTool engine: {e}")
+
+    # ---------- public API ----------
+
+    def checkout(self, lang, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        to_close = []
+        with self._cond:
+            lang = self._aliases.get(lang, lang)
+            to_close.extend(self._collect_idle(time.monotonic()))
+            while True:
+                idle = self._idle.get(lang)
+                if idle:
+                    engine, _ = idle.pop()
+                    self._busy[lang] = self._busy.get(lang, 0) + 1
+                    self.hits += 1
+                    break
+                if self._count(lang) < self.max_per_language:
+                    if self._total() >= self.max_total:
+                        victim = self._pop_oldest_idle(exclude=lang)
+                        if victim is not None:
+                            self.evictions += 1
+                            to_close.append(victim)
+                    if self._total() < self.max_total:
+                        # Reserve the slot before releasing the lock to start the JVM.
+                        self._busy[lang] = self._busy.get(lang, 0) + 1
+                        self.misses += 1
+                        engine = None
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(f"No LanguageTool engine available for '{lang}'")
+                self._cond.wait(remaining)
+
+        for victim in to_close:
+            self._close(victim)
+
+        try:
+            if engine is not None and not self._is_healthy(engine):
+                logger.warning(f"LanguageTool engine for {lang} is down, restarting")
+                self._close(engine)
+                with self._cond:
+                    self.restarts += 1
+                engine = None
+            if engine is None:
+                engine = self._factory(lang)
+                actual = self._language_of(engine, lang)
+                if actual != lang:
+                    # Move the reservation to the engine's real language.
+                    with self._cond:
+                        self._aliases[lang] = actual
+                        self._busy[lang] -= 1
+                        self._busy[actual] = self._busy.get(actual, 0) + 1
+                        self._cond.notify_all()
+        except Exception:
+            with self._cond:
+                self._busy[lang] -= 1
+                self._cond.notify_all()
+            raise
+        return engine
+
+    def checkin(self, lang, engine, discard=False):
+        with self._cond:
+            lang = self._aliases.get(lang, lang)
+            self._busy[lang] -= 1
+            # Aliased checkouts can leave more engines than the limit for one language.
+            discard = discard or self._count(lang) >= self.max_per_language
+            if not discard:
+                self._idle.setdefault(lang, []).append((engine, time.monotonic()))
+                self._ensure_reaper()
+            self._cond.notify_all()
+        if discard:
+            self._close(engine)
+
+    @contextmanager
+    def engine(self, lang, timeout=None):
+        engine = self.checkout(lang, timeout)
+        discard = False
+        try:
+            yield engine
+        except Exception:
+            # A failed check may mean the server died mid-request.
+            discard = not self._is_healthy(engine)
+            raise
+        finally:
+            self.checkin(lang, engine, discard=discard)
+
+    def warm_up(self, langs):
+        for lang in langs:
+            try:
+                with self.engine(lang):
+                    pass
+                logger.info(f"Warmed up LanguageTool engine for {lang}")
+            except Exception as e:
+                logger.error(f"LanguageTool warm-up failed for {lang}: {e}")
+
+    def evict_idle(self):
+        with self._cond:
+            expired = self._collect_idle(time.monotonic())
+        for engine in expired:
+            self._close(engine)
+        return len(expired)
+
+    def close(self):
+        self._reaper_stop.set()
+        with self._cond:
+            engines = [e for idle in self._idle.values() for e, _ in idle]
+            self._idle = {}
+        for engine in engines:
+            self._close(engine)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._total(),
+                'idle': sum(len(v) for v in self._idle.values()),
+                'in_use': sum(self._busy.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'restarts': self.restarts,
+                'evictions': self.evictions,
+                'languages': sorted(lang for lang in set(self._idle) | set(self._busy)
+                                    if self._count(lang)),
+            }
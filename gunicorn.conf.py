@@ -0,0 +1,33 @@
+# gunicorn -c gunicorn.conf.py app:app
+import os
+import threading
+
+# With preloading (GUNICORN_PRELOAD=1 or --preload) the app and its NLP data
+# are loaded once in the master and shared copy-on-write by the workers.
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+
+def on_starting(server):
+    # The app module is already imported here when preloading; without it,
+    # importing it in the master would only duplicate the workers' work.
+    if server.cfg.preload_app:
+        from app import preload_models
+        preload_models()
+
+
+def post_fork(server, worker):
+    # Start the LanguageTool servers for the configured languages as soon as
+    # the worker exists, so the first /grammar call is not a cold start. This
+    # runs in the background: a slow first start (download, several languages)
+    # must not keep the worker from reporting in before gunicorn's timeout.
+    from app import warm_up_language_tools
+    threading.Thread(target=warm_up_language_tools, name='languagetool-warm-up', daemon=True).start()
+
+
+def worker_exit(server, worker):
+    from app import activity_log, language_tools, result_writer, upload_jobs
+    upload_jobs.shutdown(wait=False)
+    language_tools.close()
+    activity_log.close()
+    if result_writer is not None:
+        result_writer.close()
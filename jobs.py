@@ -0,0 +1,206 @@
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ['queued', 'running']
+
+
+class QueueFull(Exception):
+    pass
+
+
+class UserLimitReached(Exception):
+    pass
+
+
+# ---------- inside worker processes ----------
+
+_progress_queue = None
+_current_job_id = None
+
+
+def _init_worker(progress_queue, initializer):
+    global _progress_queue
+    _progress_queue = progress_queue
+    if initializer is not None:
+        initializer()
+
+
+def _run_job(job_id, fn, args):
+    global _current_job_id
+    _current_job_id = job_id
+    _progress_queue.put((job_id, 'running', None))
+    try:
+        return fn(*args)
+    finally:
+        _current_job_id = None
+
+
+def report_progress(**progress):
+    # No-op unless called from a job running in the pool.
+    if _progress_queue is not None and _current_job_id is not None:
+        _progress_queue.put((_current_job_id, 'progress', progress))
+
+
+# ---------- inside the web worker ----------
+
+# Runs long jobs in a local process pool and keeps their status and progress
+# in a Mongo collection, so any web worker can answer a status poll. Results go
+# to result_store (anything with put/get) and the job keeps only their id, since
+# they can be larger than a Mongo document. Jobs still active after job_timeout
+# (e.g. their web worker died) are reported as failed.
+class JobQueue:
+    def __init__(self, collection, max_workers=2, max_pending=20, per_user_limit=2,
+                 result_ttl=3600, job_timeout=1800, initializer=None, on_done=None,
+                 result_store=None):
+        self.collection = collection
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+        self.initializer = initializer
+        self.on_done = on_done
+        self.result_store = result_store
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor = None
+        self._progress_queue = None
+        self._listener = None
+
+    def _start(self):
+        # Started on first use, after gunicorn has forked the web worker.
+        # Job processes come from a forkserver (or are spawned), not forked from
+        # this multi-threaded worker, where another thread may hold a lock.
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(method)
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self._progress_queue = context.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue, self.initializer),
+        )
+        self._listener = threading.Thread(target=self._listen, name='job-progress', daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        while True:
+            item = self._progress_queue.get()
+            if item is None:
+                return
+            job_id, kind, progress = item
+            try:
+                if kind == 'running':
+                    self.collection.update_one({'_id': job_id, 'status': 'queued'},
+                                               {'$set': {'status': 'running'}})
+                else:
+                    self.collection.update_one({'_id': job_id}, {'$set': {'progress': progress}})
+            except Exception as e:
+                logger.error(f"Job progress update failed for {job_id}: {e}")
+
+    def _expiry(self):
+        return datetime.now(timezone.utc) + timedelta(seconds=self.result_ttl)
+
+    def submit(self, username, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull("Too many jobs queued, try again later.")
+            active = self.collection.count_documents({
+                'username': username,
+                'status': {'$in': ACTIVE_STATUSES},
+                'timeout_at': {'$gt': datetime.now(timezone.utc)},
+            })
+            if active >= self.per_user_limit:
+                raise UserLimitReached(f"At most {self.per_user_limit} jobs can run at once.")
+            if self._executor is None:
+                self._start()
+            job_id = uuid.uuid4().hex
+            now = datetime.now(timezone.utc)
+            self.collection.insert_one({
+                '_id': job_id,
+                'username': username,
+                'status': 'queued',
+                'progress': None,
+                'created_at': now,
+                'timeout_at': now + timedelta(seconds=self.job_timeout),
+                'expires_at': self._expiry() + timedelta(seconds=self.job_timeout),
+            })
+            self._pending += 1
+        future = self._executor.submit(_run_job, job_id, fn, args)
+        future.add_done_callback(lambda f: self._finish(job_id, username, f))
+        return job_id
+
+    def _finish(self, job_id, username, future):
+        with self._lock:
+            self._pending -= 1
+        update = {'expires_at': self._expiry()}
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            result = None
+            update.update(status='failed', error=str(e))
+        else:
+            try:
+                if self.result_store is not None:
+                    update.update(status='done', result_id=self.result_store.put(result))
+                else:
+                    update.update(status='done', result=result)
+            except Exception as e:
+                logger.error(f"Job {job_id} result could not be stored: {e}")
+                update.update(status='failed', error='The result could not be saved.')
+        try:
+            self.collection.update_one({'_id': job_id}, {'$set': update})
+        except Exception as e:
+            logger.error(f"Job {job_id} status could not be updated: {e}")
+            try:
+                # A smaller update, so that the job does not stay 'running'.
+                self.collection.update_one({'_id': job_id}, {'$set': {
+                    'status': 'failed', 'error': 'The result could not be saved.',
+                    'expires_at': update['expires_at']}})
+            except Exception as e:
+                logger.error(f"Job {job_id} could not be marked as failed: {e}")
+        if result is not None and self.on_done is not None:
+            try:
+                self.on_done(username, result)
+            except Exception as e:
+                logger.error(f"Job {job_id} completion handler failed: {e}")
+
+    def get(self, job_id):
+        job = self.collection.find_one({'_id': job_id})
+        # Mongo's TTL monitor only runs once a minute.
+        if job is not None:
+            expires_at = job['expires_at']
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                return None
+            timeout_at = job.get('timeout_at')
+            if job['status'] in ACTIVE_STATUSES and timeout_at is not None:
+                if timeout_at.tzinfo is None:
+                    timeout_at = timeout_at.replace(tzinfo=timezone.utc)
+                if timeout_at < datetime.now(timezone.utc):
+                    job.update(status='failed', error='The job did not finish in time.')
+        return job
+
+    def result(self, job):
+        if 'result_id' in job:
+            return self.result_store.get(job['result_id'])
+        return job.get('result')
+
+    def stats(self):
+        with self._lock:
+            return {'pending': self._pending, 'max_pending': self.max_pending}
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._progress_queue.put(None)
+            self._executor = None
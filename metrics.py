@@ -0,0 +1,245 @@
+import cProfile
+import functools
+import heapq
+import io
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self.labelnames, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}   # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        names = self.labelnames + ('le',)
+        out = []
+        with self._lock:
+            for key, state in self._values.items():
+                for bound, count in zip(self.buckets, state):
+                    out.append((f'{self.name}_bucket', names, key + (bound,), count))
+                out.append((f'{self.name}_bucket', names, key + ('+Inf',), state[-1]))
+                out.append((f'{self.name}_sum', self.labelnames, key, state[-2]))
+                out.append((f'{self.name}_count', self.labelnames, key, state[-1]))
+        return out
+
+
+# Reports values owned by other objects (cache, engine pool, log writer) at scrape time.
+class Collector:
+    def __init__(self, name, help, type, labelnames, read):
+        self.name, self.help, self.type, self.labelnames = name, help, type, tuple(labelnames)
+        self._read = read
+
+    def samples(self):
+        return [(self.name, self.labelnames, key, value) for key, value in self._read()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, name, help, type, labelnames, read):
+        return self.register(Collector(name, help, type, labelnames, read))
+
+    def render(self):
+        # Prometheus text exposition format, version 0.0.4.
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labelnames, values, value in metric.samples():
+                lines.append(f'{name}{_label_text(labelnames, values)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'spellapp_stage_seconds', 'Time spent in each processing stage.', ['stage'])
+STAGE_ERRORS = REGISTRY.counter(
+    'spellapp_stage_errors_total', 'Errors raised or handled in each processing stage.', ['stage'])
+INPUT_CHARS = REGISTRY.histogram(
+    'spellapp_input_chars', 'Size of the text handed to each operation.', ['operation'], SIZE_BUCKETS)
+REQUEST_SECONDS = REGISTRY.histogram(
+    'spellapp_request_seconds', 'Request latency by endpoint and status.', ['endpoint', 'status'])
+MONGO_SECONDS = REGISTRY.histogram(
+    'spellapp_mongo_seconds', 'MongoDB command latency.', ['command', 'outcome'])
+
+
+def timed(stage):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                STAGE_ERRORS.inc(stage=stage)
+                raise
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorator
+
+
+def timed_iter(stage, iterable):
+    # Times only the work done inside the iterator, not the consumer's.
+    iterator = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                total += time.perf_counter() - start
+            yield item
+    except GeneratorExit:
+        raise
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(total, stage=stage)
+
+
+@contextmanager
+def timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name, outcome='ok')
+
+    def failed(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name, outcome='error')
+
+
+# Keeps the N slowest requests. A sampled fraction of requests runs under
+# cProfile, and their top functions are kept alongside the timing.
+class SlowRequestRecorder:
+    def __init__(self, keep=0, sample_rate=0.0, top_functions=25):
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self.top_functions = top_functions
+        self._lock = threading.Lock()
+        self._heap = []     # (duration, seq, entry)
+        self._seq = 0
+
+    @property
+    def enabled(self):
+        return self.keep > 0
+
+    def start_profile(self):
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running.
+            return None
+        return profiler
+
+    def _is_slow(self, duration):
+        return len(self._heap) < self.keep or duration > self._heap[0][0]
+
+    def record(self, method, path, status, duration, profiler=None):
+        if profiler is not None:
+            profiler.disable()
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._is_slow(duration):
+                return
+        entry = {'method': method, 'path': path, 'status': status,
+                 'seconds': round(duration, 6), 'at': time.time()}
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(self.top_functions)
+            entry['profile'] = out.getvalue()
+        with self._lock:
+            self._seq += 1
+            if len(self._heap) < self.keep:
+                heapq.heappush(self._heap, (duration, self._seq, entry))
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, (duration, self._seq, entry))
+
+    def slowest(self):
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, key=lambda x: x[0], reverse=True)]
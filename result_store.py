@@ -0,0 +1,67 @@
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Server-side home for processing results that used to live in the session cookie.
+# The session keeps only the id returned by put(). Results are held in a
+# ResultCache (in-process LRU, optionally backed by a SQLite file that all
+# workers on the host share). With a writer (an ActivityLogWriter for the
+# results collection) they are also copied to Mongo in the background, so other
+# hosts can load them; results over max_shared_bytes stay local, since whole
+# uploads can be larger than a Mongo document.
+class ResultStore:
+    def __init__(self, cache, writer=None, ttl=86400, max_shared_bytes=1024 * 1024):
+        self.cache = cache
+        self.writer = writer
+        self.ttl = ttl
+        self.max_shared_bytes = max_shared_bytes
+        self._indexed = False
+
+    @staticmethod
+    def _key(result_id):
+        return f"result:{result_id}"
+
+    def _create_index(self):
+        try:
+            self.writer.collection.create_index('expires_at', expireAfterSeconds=0)
+        except Exception as e:
+            logger.error(f"Result store index could not be created: {e}")
+
+    def put(self, result):
+        result_id = uuid.uuid4().hex
+        self.cache.set(self._key(result_id), result)
+        if self.writer is not None:
+            if not self._indexed:
+                self._indexed = True
+                threading.Thread(target=self._create_index, name='result-store-index', daemon=True).start()
+            if len(json.dumps(result).encode('utf-8')) <= self.max_shared_bytes:
+                self.writer.write({
+                    '_id': result_id,
+                    'result': result,
+                    'expires_at': datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+                })
+        return result_id
+
+    def get(self, result_id):
+        if not result_id:
+            return None
+        result = self.cache.get(self._key(result_id))
+        if result is None and self.writer is not None:
+            try:
+                doc = self.writer.collection.find_one({'_id': result_id})
+            except Exception as e:
+                logger.error(f"Result store read failed: {e}")
+                return None
+            if doc is not None:
+                expires_at = doc['expires_at']
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                if expires_at >= datetime.now(timezone.utc):
+                    result = doc['result']
+                    self.cache.set(self._key(result_id), result)
+        return result
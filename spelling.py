@@ -0,0 +1,205 @@
+import logging
+import os
+import random
+import re
+import string
+import time
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Same tokenization as TextBlob.correct(): words and single punctuation marks.
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Mirrors textblob's PUNCTUATION constant, which suggest() checks before correcting.
+PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+
+
+def read_word_counts(path):
+    # Pattern/TextBlob frequency file: "word count" per line, ";;;" comments.
+    counts = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(';;;'):
+                continue
+            word, count = line.split()[:2]
+            counts[word] = int(count)
+    return counts
+
+
+def _deletes(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _within_one_edit(a, b):
+    # True if b is reachable from a by one delete, insert, replace or adjacent swap.
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return (i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i]
+                and a[i + 2:] == b[i + 2:])
+    if la > lb:
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+# Word-frequency spelling corrector.
+# Gives the same answers as TextBlob's Norvig corrector (known word, else the most
+# frequent known word at edit distance 1, else at distance 2) but finds distance-2
+# candidates through a single-delete index instead of enumerating every edit2 string.
+class SpellingEngine:
+    def __init__(self, counts, cache_size=50000):
+        self.counts = counts
+        self.alphabet = ''.join(sorted({c for w in counts for c in w}))
+        self._index = {}
+        for word in counts:
+            for d in _deletes(word):
+                self._index.setdefault(d, []).append(word)
+        self.correct_token = lru_cache(maxsize=cache_size)(self._correct_token)
+
+    @classmethod
+    def from_file(cls, path, cache_size=50000):
+        return cls(read_word_counts(path), cache_size=cache_size)
+
+    def _edit1(self, w):
+        splits = [(w[:i], w[i:]) for i in range(len(w) + 1)]
+        edits = {a + b[1:] for a, b in splits if b}
+        edits.update(a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1)
+        edits.update(a + c + b[1:] for a, b in splits if b for c in self.alphabet)
+        edits.update(a + c + b for a, b in splits for c in self.alphabet)
+        return edits
+
+    def _known_edit2(self, edit1):
+        counts, index = self.counts, self._index
+        found = set()
+        for u in edit1:
+            # Words one insert away from u.
+            found.update(index.get(u, ()))
+            for d in _deletes(u):
+                # Words one delete away from u.
+                if d in counts:
+                    found.add(d)
+                # Words sharing a delete with u: one replace or swap away (verified).
+                for word in index.get(d, ()):
+                    if word not in found and _within_one_edit(u, word):
+                        found.add(word)
+        return found
+
+    def correct_word(self, w):
+        if len(w) == 1 or w in PUNCTUATION or w in string.whitespace:
+            return w
+        if w.replace(".", "").isdigit():
+            return w
+        if w in self.counts:
+            return w.title() if w.istitle() else w
+        edit1 = self._edit1(w)
+        candidates = [c for c in edit1 if c in self.counts]
+        if not candidates:
+            candidates = self._known_edit2(edit1)
+        if not candidates:
+            return w.title() if w.istitle() else w
+        best = max((self.counts[c], c) for c in candidates)[1]
+        return best.title() if w.istitle() else best
+
+    def _correct_token(self, token):
+        # "Hello," -> "Hello" + "," ; punctuation and case are kept as they are.
+        return "".join(self.correct_word(w) for w in TOKEN_RE.findall(token))
+
+    def correct(self, text):
+        # Whitespace-separated tokens are corrected independently and re-joined
+        # with single spaces, exactly like the old per-token TextBlob loop.
+        return " ".join(self.correct_token(token) for token in text.split())
+
+    def stats(self):
+        info = self.correct_token.cache_info()
+        return {
+            'words': len(self.counts),
+            'cache_hits': info.hits,
+            'cache_misses': info.misses,
+            'cache_size': info.currsize,
+        }
+
+
+def default_dictionary_path(lang):
+    if lang == 'en':
+        import textblob
+        return os.path.join(os.path.dirname(textblob.__file__), 'en', 'en-spelling.txt')
+    return None
+
+
+def reference_corpus(counts, n_tokens=500, seed=0):
+    # Deterministic mix of dictionary words with zero to two random edits, in
+    # the shapes TextBlob treats specially: Title case, trailing punctuation,
+    # digits and lone punctuation marks.
+    rng = random.Random(seed)
+    words = sorted(w for w in counts if len(w) > 2)
+    tokens = []
+    for _ in range(n_tokens):
+        word = rng.choice(words)
+        for _ in range(rng.choice((0, 1, 1, 2))):
+            i = rng.randrange(len(word))
+            edit = rng.choice(('delete', 'insert', 'replace', 'swap'))
+            c = rng.choice(string.ascii_lowercase)
+            if edit == 'delete' and len(word) > 1:
+                word = word[:i] + word[i + 1:]
+            elif edit == 'insert':
+                word = word[:i] + c + word[i:]
+            elif edit == 'replace':
+                word = word[:i] + c + word[i + 1:]
+            elif i + 1 < len(word):
+                word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        shape = rng.random()
+        if shape < 0.1:
+            word = word.title()
+        elif shape < 0.2:
+            word += rng.choice(('.', ',', '!', '?', "'s"))
+        elif shape < 0.25:
+            word = rng.choice(('3.14', '2024', '-', '(', 'e.g.'))
+        tokens.append(word)
+    return tokens
+
+
+def compare_with_textblob(engine, tokens):
+    # The replaced implementation: one TextBlob(token).correct() per token.
+    from textblob import TextBlob
+    start = time.perf_counter()
+    expected = [TextBlob(token).correct().string for token in tokens]
+    textblob_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = [engine.correct_token(token) for token in tokens]
+    engine_seconds = time.perf_counter() - start
+    mismatches = [(t, e, a) for t, e, a in zip(tokens, expected, actual) if e != a]
+    return mismatches, textblob_seconds, engine_seconds
+
+
+# python spelling.py [--tokens N] [--seed S] [text file]
+# Checks that SpellingEngine gives exactly the corrections TextBlob gives.
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Compare SpellingEngine with TextBlob.correct().")
+    parser.add_argument('file', nargs='?', help="text whose tokens are compared (default: a generated corpus)")
+    parser.add_argument('--tokens', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    engine = SpellingEngine.from_file(default_dictionary_path('en'), cache_size=0)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            tokens = f.read().split()
+    else:
+        tokens = reference_corpus(engine.counts, args.tokens, args.seed)
+    mismatches, textblob_seconds, engine_seconds = compare_with_textblob(engine, tokens)
+    for token, expected, actual in mismatches:
+        print(f"{token!r}: TextBlob {expected!r}, SpellingEngine {actual!r}")
+    print(f"{len(tokens)} tokens, {len(mismatches)} mismatches; TextBlob {textblob_seconds:.2f} s, "
+          f"SpellingEngine {engine_seconds:.2f} s ({textblob_seconds / max(engine_seconds, 1e-9):.0f}x)")
+    sys.exit(1 if mismatches else 0)